@@ -1,271 +1,315 @@
 import csv
+import concurrent.futures
 import os
 import argparse
 import random
-import subprocess
 import re
-from typing import Optional, Tuple, Dict, List, Any, Callable
+import hashlib
+import io
+import tempfile
+from typing import Optional, Tuple, Dict, List, Any, Callable, BinaryIO, Union
 import itertools
-from tqdm import tqdm
-from pprint import pprint
+import logging
+import multiprocessing
 import math
 import time
-
-random.seed(2430)
+import numpy as np
+
+from tacos_runner import (
+    attempt_file,
+    file_digest,
+    load_synthesis_cache,
+    run_batch,
+    run_command,
+    store_synthesis_cache,
+    synthesis_cache_key,
+)
+
+SEED = 2430
+random.seed(SEED)
 LATENCY = 500
+logger = logging.getLogger(__name__)
+# the topology files are written as bytes, with csv.writer's default line terminator
+_EOL = csv.excel.lineterminator.encode()
+_HEADER = b"%d" + _EOL + b"Src,Dest,Latency (ns),Bandwidth (GB/s)" + _EOL
+_EDGE_ROW = b"%d,%d,%d,%d" + _EOL
+# a _-delimited file name field after the topology: a name immediately followed by its
+# (possibly negative) numeric value
+_PARAM_RE = re.compile(r"_([^_\d-]*)([-\d][^_]*)")
 
 
 def params_to_file_name(output_dir: str, topology, params: List[str]) -> str:
     return os.path.join(output_dir, f"{topology}_" + "_".join(params) + ".csv")
 
 
+def write_edge_rows(
+    edges: Union[np.ndarray, List[Tuple[int, int, int, int]]], csvfile: BinaryIO
+) -> None:
+    """
+    Writes edges as CSV rows.
+
+    The rows are formatted by a single printf-style `bytes %` over all of them, so the
+    integer formatting of every row runs inside one C call instead of once per row
+    (np.savetxt formats row by row in Python).
+
+    Args:
+        edges (Union[np.ndarray, List[Tuple[int, int, int, int]]]): (src, dest, latency,
+            bandwidth) rows, as an (n, 4) integer array or a list of tuples.
+        csvfile (BinaryIO): The file to write the rows to.
+    """
+    if isinstance(edges, np.ndarray):
+        values = edges.ravel().tolist()
+    else:
+        values = list(itertools.chain.from_iterable(edges))
+    csvfile.write((_EDGE_ROW * len(edges)) % tuple(values))
+
+
+def write_links(
+    src: np.ndarray,
+    dest: np.ndarray,
+    slow_links: List[int],
+    bandwidth_ratio: int,
+    csvfile: BinaryIO,
+) -> None:
+    """
+    Writes undirected links as CSV rows, each one in both directions.
+
+    Args:
+        src (np.ndarray): One end of every link.
+        dest (np.ndarray): The other end of every link.
+        slow_links (List[int]): Indices of the links with bandwidth 1 instead of bandwidth_ratio.
+        bandwidth_ratio (int): Bandwidth of the other links.
+        csvfile (BinaryIO): The file to write the rows to.
+    """
+    bandwidth = np.full(len(src), bandwidth_ratio, dtype=np.int64)
+    bandwidth[slow_links] = 1
+    edges = np.empty((2 * len(src), 4), dtype=np.int64)
+    edges[0::2, 0] = edges[1::2, 1] = src
+    edges[0::2, 1] = edges[1::2, 0] = dest
+    edges[:, 2] = LATENCY
+    edges[0::2, 3] = edges[1::2, 3] = bandwidth
+    write_edge_rows(edges, csvfile)
+
+
 def generate_ring(
     world_size: int,
     bandwidth_ratio: int,
     slow_link_proportion: float,
-    csv_writer: csv.DictWriter,
+    csvfile: BinaryIO,
 ) -> None:
-    csv_writer.writerow([world_size])
-    csv_writer.writerow(["Src", "Dest", "Latency (ns)", "Bandwidth (GB/s)"])
-    # generate edge list
-    edges = []
-    for i in range(world_size):
-        src = i
-        dest = (i + 1) % world_size
-        edges.append((src, dest))
-        edges.append((dest, src))
-
-    # sample slow edges
-    slow_edges = random.sample(edges, int(len(edges) * slow_link_proportion))
+    csvfile.write(_HEADER % world_size)
+    # sample slow links by index: link i joins i and i + 1, slow in both directions
+    slow_links = random.sample(range(world_size), int(world_size * slow_link_proportion))
 
     # write to csv
-    for edge in edges:
-        src, dest = edge
-        bandwidth = 1 if edge in slow_edges else bandwidth_ratio
-        csv_writer.writerow([src, dest, LATENCY, bandwidth])
-
-
-def generate_outin(
-    world_size: int, bandwidth_ratio: int, csv_writer: csv.DictWriter
-) -> None:
-    csv_writer.writerow([world_size])
-    csv_writer.writerow(["Src", "Dest", "Latency (ns)", "Bandwidth (GB/s)"])
-    for i in range(world_size):
-        for j in range(world_size):
-            if i != j:
-                if abs(i - j) != 1 or (i == 0 and j == world_size - 1):
-                    # slow inside
-                    csv_writer.writerow([i, j, LATENCY, 1])
-                    csv_writer.writerow([j, i, LATENCY, 1])
-                else:
-                    # fast inside (consecutive)
-                    csv_writer.writerow([i, j, LATENCY, bandwidth_ratio])
-                    csv_writer.writerow([j, i, LATENCY, bandwidth_ratio])
+    nodes = np.arange(world_size)
+    write_links(nodes, (nodes + 1) % world_size, slow_links, bandwidth_ratio, csvfile)
+
+
+def generate_outin(world_size: int, bandwidth_ratio: int, csvfile: BinaryIO) -> None:
+    csvfile.write(_HEADER % world_size)
+    nodes = np.arange(world_size)
+    src, dest = np.meshgrid(nodes, nodes, indexing="ij")
+    not_self = src != dest
+    src, dest = src[not_self], dest[not_self]
+    # fast inside (consecutive), slow everywhere else including the wrap-around
+    fast = (np.abs(src - dest) == 1) & ~((src == 0) & (dest == world_size - 1))
+    bandwidth = np.where(fast, bandwidth_ratio, 1)
+    # the (i, j) grid already holds both directions of every link, so each is written once
+    edges = np.empty((len(src), 4), dtype=np.int64)
+    edges[:, 0] = src
+    edges[:, 1] = dest
+    edges[:, 2] = LATENCY
+    edges[:, 3] = bandwidth
+    write_edge_rows(edges, csvfile)
+
+
+def generate_mesh(world_size: int, bandwidth_ratio: int, csvfile: BinaryIO) -> None:
+    csvfile.write(_HEADER % world_size)
+    nodes = np.arange(world_size)
+    src, dest = np.meshgrid(nodes, nodes, indexing="ij")
+    not_self = src != dest
+    src, dest = src[not_self], dest[not_self]
+    # a fast ring (including the wrap-around) inside a fully connected slow mesh
+    fast = (dest == (src + 1) % world_size) | (src == (dest + 1) % world_size)
+    bandwidth = np.where(fast, bandwidth_ratio, 1)
+    edges = np.empty((len(src), 4), dtype=np.int64)
+    edges[:, 0] = src
+    edges[:, 1] = dest
+    edges[:, 2] = LATENCY
+    edges[:, 3] = bandwidth
+    write_edge_rows(edges, csvfile)
 
 
 def generate_grid(
     world_size: int,
     bandwidth_ratio: int,
     slow_link_proportion: float,
-    csv_writer: csv.DictWriter,
+    csvfile: BinaryIO,
 ) -> None:
-    csv_writer.writerow([world_size])
-    csv_writer.writerow(["Src", "Dest", "Latency (ns)", "Bandwidth (GB/s)"])
-    # generate edge list
-    edges = []
+    csvfile.write(_HEADER % world_size)
+    # generate the undirected links, each node's right link before its bottom one
     side_length = int(math.sqrt(world_size))
-    for i in range(side_length):
-        for j in range(side_length):
-            node = i * side_length + j
-            if j < side_length - 1:
-                right_node = node + 1
-                edges.append((node, right_node))
-                edges.append((right_node, node))
-            if i < side_length - 1:
-                bottom_node = node + side_length
-                edges.append((node, bottom_node))
-                edges.append((bottom_node, node))
-
-    # sample slow edges
-    slow_edges = random.sample(edges, int(len(edges) * slow_link_proportion))
+    nodes = np.arange(side_length * side_length)
+    has_link = np.column_stack(
+        (nodes % side_length < side_length - 1, nodes // side_length < side_length - 1)
+    ).ravel()
+    src = np.repeat(nodes, 2)[has_link]
+    dest = np.column_stack((nodes + 1, nodes + side_length)).ravel()[has_link]
+
+    # sample slow links by index, each is slow in both directions
+    slow_links = random.sample(range(len(src)), int(len(src) * slow_link_proportion))
 
     # write to csv
-    for edge in edges:
-        src, dest = edge
-        bandwidth = 1 if edge in slow_edges else bandwidth_ratio
-        csv_writer.writerow([src, dest, LATENCY, bandwidth])
+    write_links(src, dest, slow_links, bandwidth_ratio, csvfile)
 
 
 def generate_hierarchical(
-    layer_sizes: Tuple[int], bandwidth_ratio: Tuple[int], csv_writer: csv.DictWriter
+    layer_sizes: Tuple[int], bandwidth_ratio: Tuple[int], csvfile: BinaryIO
 ) -> None:
     assert len(layer_sizes) == len(bandwidth_ratio) - 1
     # support two layer for now
     assert len(layer_sizes) == 2
 
-    csv_writer.writerow([layer_sizes[0] + layer_sizes[1] * layer_sizes[0]])
-    csv_writer.writerow(["Src", "Dest", "Latency (ns)", "Bandwidth (GB/s)"])
+    world_size = layer_sizes[0] + layer_sizes[1] * layer_sizes[0]
+    csvfile.write(_HEADER % world_size)
+    switch_suffix, uplink_suffix, mesh_suffix = (
+        b",%d,%d%s" % (LATENCY, ratio, _EOL) for ratio in bandwidth_ratio
+    )
 
     # generate edges for switch layer
+    lines = []
     for i in range(1, layer_sizes[0] + 1):
-        csv_writer.writerow([0, i, LATENCY, bandwidth_ratio[0]])
+        lines.append(b"0,%d%s" % (i, switch_suffix))
         # generate cube-mesh
         cube_mesh_ids = [
             layer_sizes[0] + (i - 1) * layer_sizes[1] + j
             for j in range(1, layer_sizes[1] + 1)
         ]
         for j in cube_mesh_ids:
-            csv_writer.writerow([i, j, LATENCY, bandwidth_ratio[1]])
+            lines.append(b"%d,%d%s" % (i, j, uplink_suffix))
         for src in cube_mesh_ids:
             for dest in cube_mesh_ids:
                 if src != dest:
-                    csv_writer.writerow([src, dest, LATENCY, bandwidth_ratio[2]])
+                    lines.append(b"%d,%d%s" % (src, dest, mesh_suffix))
+    csvfile.write(b"".join(lines))
+
+
+# topology -> (swept parameters, how many of the leading ones are passed to its
+# generator, type of its bandwidth ratios); hierarchical sweeps slow_link_proportion
+# without using it yet
+TOPOLOGY_PARAMS: Dict[str, Tuple[List[str], int, type]] = {
+    "ring": (["world_size", "bandwidth_ratio", "slow_link_proportion"], 3, int),
+    "outin": (["world_size", "bandwidth_ratio"], 2, int),
+    "mesh": (["world_size", "bandwidth_ratio"], 2, int),
+    "grid": (["world_size", "bandwidth_ratio", "slow_link_proportion"], 3, int),
+    "hierarchical": (
+        ["layer_sizes", "bandwidth_ratio", "slow_link_proportion"],
+        2,
+        tuple,
+    ),
+}
+
+
+_GRAPH_GENERATION_FNS: Dict[str, Callable] = {
+    "ring": generate_ring,
+    "outin": generate_outin,
+    "mesh": generate_mesh,
+    "grid": generate_grid,
+    "hierarchical": generate_hierarchical,
+}
 
 
 def get_graph_generation_fn(topology: str) -> Callable:
-    match topology:
-        case "ring":
-            return generate_ring
-        case "outin":
-            return generate_outin
-        case "grid":
-            return generate_grid
-        case "hierarchical":
-            return generate_hierarchical
-
-
-def create_csv_files(output_dir: str, params: Dict[str, List[Any]]) -> None:
-    # Create the output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"CSV files will be generated in the '{output_dir}' directory.")
-
-    assert "topology" in params
-    assert params["topology"] in ["ring", "outin", "hierarchical"]
-
-    topology = params["topology"]
-    del params["topology"]
-
-    match topology:
-        case "ring":
-            assert all(
-                param in params
-                for param in ["world_size", "bandwidth_ratio", "slow_link_proportion"]
-            )
-            # ring should only have scalar bandwidth ratios
-            assert all(isinstance(ratio, int) for ratio in params["bandwidth_ratio"])
-            for world_size, b_ratio, slow_prop in itertools.product(
-                params["world_size"],
-                params["bandwidth_ratio"],
-                params["slow_link_proportion"],
-            ):
-                csv_filename = params_to_file_name(
-                    output_dir, topology, map(str, [world_size, b_ratio, slow_prop])
-                )
-                with open(csv_filename, "w", newline="") as csvfile:
-                    csvwriter = csv.writer(csvfile)
-                    generate_ring(world_size, b_ratio, slow_prop, csvwriter)
-        case "outin":
-            assert all(param in params for param in ["world_size", "bandwidth_ratio"])
-            # outin should only have scalar bandwidth ratios
-            assert all(isinstance(ratio, int) for ratio in params["bandwidth_ratio"])
-            for world_size, b_ratio in itertools.product(
-                params["world_size"], params["bm"]
-            ):
-                csv_filename = params_to_file_name(
-                    output_dir, topology, [world_size, b_ratio]
-                )
-                with open(csv_filename, "w", newline="") as csvfile:
-                    csvwriter = csv.writer(csvfile)
-                    generate_outin(world_size, b_ratio, csvwriter)
-        case "grid":
-            assert all(
-                param in params
-                for param in ["world_size", "bandwidth_ratio", "slow_link_proportion"]
-            )
-            assert all(isinstance(ratio, int) for ratio in params["bandwidth_ratio"])
-            for world_size, b_ratio, slow_prop in itertools.product(
-                params["world_size"],
-                params["bandwidth_ratio"],
-                params["slow_link_proportion"],
-            ):
-                csv_filename = params_to_file_name(
-                    output_dir, topology, [world_size, b_ratio, slow_prop]
-                )
-                with open(csv_filename, "w", newline="") as csvfile:
-                    csvwriter = csv.writer(csvfile)
-                    generate_grid(world_size, b_ratio, slow_prop, csvwriter)
-        case "hierarchical":
-            assert all(
-                param in params
-                for param in ["layer_sizes", "bandwidth_ratio", "slow_link_proportion"]
-            )
-            # hierarchical should have tuple bandwidth ratios
-            assert all(isinstance(ratio, tuple) for ratio in params["bandwidth_ratio"])
-            for layer_sizes, b_ratio, slow_prop in itertools.product(
-                params["layer_sizes"], params["bm"], params["bbp"]
-            ):
-                csv_filename = params_to_file_name(
-                    output_dir, topology, [layer_sizes, b_ratio, slow_prop], output_dir
-                )
-                with open(csv_filename, "w", newline="") as csvfile:
-                    csvwriter = csv.writer(csvfile)
-                    generate_hierarchical(layer_sizes, b_ratio, csvwriter)
-        case _:
-            raise ValueError(f"Invalid topology: {topology}")
+    return _GRAPH_GENERATION_FNS[topology]
 
 
-def extract_synthesis_time(output: str) -> Optional[int]:
+def write_topology_file(csv_filename: str, generate_fn: Callable, args: Tuple) -> str:
     """
-    Extracts the synthesized collective time in picoseconds from the command output.
+    Generates a topology into csv_filename. The random generator is seeded from the file
+    name, so a file's contents only depend on its parameters and not on which other files
+    were generated before it (or in which process).
 
     Args:
-        output (str): The standard output from the shell command.
+        csv_filename (str): Path of the CSV file to create.
+        generate_fn (Callable): The topology generator, called as generate_fn(*args, csvfile).
+        args (Tuple): Arguments for generate_fn.
 
     Returns:
-        Optional[int]: The extracted synthesis time in ps, or None if not found.
+        str: A digest of the file's contents.
     """
-    match = re.search(r"Synthesized Collective Time:\s+(\d+)\s+ps", output)
-    if match:
-        return int(match.group(1))
-    else:
-        return None
+    random.seed(f"{SEED}_{os.path.basename(csv_filename)}")
+    buffer = io.BytesIO()
+    generate_fn(*args, buffer)
+    body = buffer.getvalue()
+
+    if os.path.lexists(csv_filename):
+        os.remove(csv_filename)
+    with open(csv_filename, "wb") as csvfile:
+        csvfile.write(body)
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
 
 
-def run_command(
-    command: List[str], cwd: Optional[str] = None
-) -> Tuple[Optional[str], Optional[str]]:
+def create_csv_files(
+    output_dir: str, params: Dict[str, List[Any]], processes: int = 1
+) -> List[Tuple[str, Dict[str, Any]]]:
     """
-    Executes a shell command and captures its standard output and standard error.
+    Generates one topology CSV file per combination of the swept parameters. Files that
+    come out identical (e.g. ones differing only in a parameter the generator ignores) are
+    made symlinks to the first of them, so run_tacos_commands only runs tacos.sh on it once.
 
     Args:
-        command (List[str]): The command and its arguments as a list.
-        cwd (Optional[str]): Directory to run the command in.
+        output_dir (str): Directory to write the CSV files to.
+        params (Dict[str, List[Any]]): The topology and the values to sweep for each of its
+            parameters.
+        processes (int): Number of worker processes generating files in parallel.
 
     Returns:
-        Tuple[Optional[str], Optional[str]]: A tuple containing stdout and stderr, or (None, None) if an error occurs.
+        List[Tuple[str, Dict[str, Any]]]: The path of every generated file with the parameter
+        values it was generated from, ready to be passed to run_tacos_commands.
     """
-    try:
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True,
-        )
-        return result.stdout, result.stderr
-    except subprocess.CalledProcessError as e:
-        print(f"Command '{' '.join(command)}' failed with exit code {e.returncode}")
-        print(f"Error Output: {e.stderr}")
-        return None, None
-    except FileNotFoundError:
-        print(f"Command not found: {command[0]}")
-        return None, None
+    # Create the output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"CSV files will be generated in the '{output_dir}' directory.")
+
+    assert "topology" in params
+    topology = params["topology"]
+    del params["topology"]
+    if topology not in TOPOLOGY_PARAMS:
+        raise ValueError(f"Invalid topology: {topology}")
+
+    keys, num_args, ratio_type = TOPOLOGY_PARAMS[topology]
+    missing = set(keys) - params.keys()
+    assert not missing, f"missing params for {topology}: {sorted(missing)}"
+    assert all(isinstance(ratio, ratio_type) for ratio in params["bandwidth_ratio"])
+    generate_fn = get_graph_generation_fn(topology)
+    file_entries = []
+    jobs = []
+    for combo in itertools.product(*(params[key] for key in keys)):
+        csv_filename = params_to_file_name(output_dir, topology, map(str, combo))
+        file_entries.append((csv_filename, dict(zip(keys, combo))))
+        jobs.append((csv_filename, generate_fn, combo[:num_args]))
+
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            digests = pool.starmap(write_topology_file, jobs)
+    else:
+        digests = [write_topology_file(*job) for job in jobs]
+
+    # maps content digests to the file first written with them
+    seen = {}
+    for (csv_filename, _), digest in zip(file_entries, digests):
+        if seen.setdefault(digest, csv_filename) != csv_filename:
+            os.remove(csv_filename)
+            os.symlink(os.path.basename(seen[digest]), csv_filename)
+    return file_entries
 
 
 def get_file_parameters(filename: str):
     """
-    Extracts group_size and bad_bandwidth_proportion from the filename.
-    Assumes that the filename follows the pattern 'ring_<group_size>_<bad_bandwidth_proportion>.csv'.
+    Extracts the sweep parameters from the filename.
+    Assumes that the filename follows the pattern '<topology>_<name><value>_<name><value>....csv',
+    e.g. 'ring_gs10_bm50_bbp0.2.csv'.
 
     Args:
         filename (str): The name of the file.
@@ -273,21 +317,18 @@ def get_file_parameters(filename: str):
     Returns:
         Dict[str, List[Any]]: A dictionary containing the extracted parameters.
     """
-    # extracting the existing parameters using _ as essentially a delimiter
-    pattern = r"-?\d+\.?\d*"
-    # extracts the parameter value as well as the starting index of the match for each match
-    matches = [
-        (match.group(), match.start()) for match in re.finditer(pattern, filename)
-    ]
-    # constructing the parameters dictionary
-    parameters = {}
-    for value, index in matches:
-        parameters[filename[filename.rfind("_", 0, index) + 1 : index]] = value
-    return parameters
+    stem = filename[: -len(".csv")] if filename.endswith(".csv") else filename
+    return dict(_PARAM_RE.findall(stem))
 
 
 def run_tacos_commands(
-    params_list: List[str], input_dir: str, output_csv: str = "ring_results.csv"
+    params_list: List[str],
+    input_dir: str,
+    output_csv: str = "ring_results.csv",
+    resume_csv: Optional[str] = None,
+    file_entries: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+    batch: bool = False,
+    cache_path: Optional[str] = None,
 ) -> None:
     """
     Executes tacos.sh commands for each CSV file in the input directory, extracts synthesis times,
@@ -297,131 +338,222 @@ def run_tacos_commands(
         params: dictionary mapping parameteres to their list of diff values
         input_dir (str): Directory containing input CSV files.
         output_csv (str): Path to the output results CSV file.
+        resume_csv (Optional[str]): Results CSV of an earlier, possibly partial, run. New rows
+            are appended to it and (file, algorithm) pairs it already contains are skipped.
+        file_entries (Optional[List[Tuple[str, Dict[str, Any]]]]): (path, parameters) pairs as
+            returned by create_csv_files. When given, these files are run instead of listing
+            input_dir and parsing the parameters back out of the file names.
+        batch (bool): Run the syntheses through one `tacos.sh --batch` process per worker
+            instead of one tacos.sh process per synthesis.
+        cache_path (Optional[str]): shelve database (e.g. '.tacos_cache/results') of the
+            synthesis times of earlier runs, keyed by file contents and algorithm flags.
+            (file, algorithm) pairs found in it are not run again, and new times are added.
     """
+    # the parameter columns, in header order
+    param_keys = list(params_list)
+    param_key_set = set(param_keys)
     params_list.append("Algorithm")
     params_list.append("Synthesis Time (ps)")
+    # multiple_5 is run several times and only its best time is recorded
     algorithms = [
-        {"name": "random", "args": ["--run"]},
-        {"name": "greedy", "args": ["--greedy", "--run"]},
-        {"name": "multiple_5", "args": ["--multiple", "5", "--run"]},
+        {"name": "random", "args": ["--run"], "runs": 1},
+        {"name": "greedy", "args": ["--greedy", "--run"], "runs": 1},
+        {"name": "multiple_5", "args": ["--multiple", "5", "--run"], "runs": 5},
     ]
 
-    now_str = time.strftime("%Y%m%d-%H%M%S")
-    os.mkdir(now_str)
-    output_csv = os.path.join(now_str, output_csv)
+    # synthesis times of earlier runs, by file digest and algorithm flags
+    cached_times = {}
+    if cache_path is not None:
+        cached_times = load_synthesis_cache(cache_path)
+    # maps the (file, algorithm) pairs that are run to their cache key
+    cache_keys = {}
+
+    # (parameter values..., algorithm) rows that were already recorded
+    done = set()
+    if resume_csv is not None:
+        output_csv = resume_csv
+        if os.path.exists(output_csv):
+            with open(output_csv, newline="") as csvfile:
+                reader = csv.reader(csvfile)
+                next(reader, None)
+                done = {tuple(row[:-1]) for row in reader}
+    else:
+        now_str = time.strftime("%Y%m%d-%H%M%S")
+        os.mkdir(now_str)
+        output_csv = os.path.join(now_str, output_csv)
 
-    with open(output_csv, "w", newline="") as csvfile:
+    with open(output_csv, "a" if done else "w", newline="") as csvfile:
         csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(params_list)
-        print(f"Results will be written to '{output_csv}'.\n")
-        print(sorted(os.listdir(input_dir)))
-        print("input_dir: ", input_dir)
-        for filename in sorted(os.listdir(input_dir)):
-            if not filename.endswith(".csv"):
-                continue
-
-            filepath = os.path.join(input_dir, filename)
-            file_params = get_file_parameters(filename)
-            # print(f"Processing File: {filename} | Group Size: {group_size} | Bad Bandwidth Proportion: {bad_bandwidth_proportion} | Bad Magnitude: {magnitude}")
-
-            for algo in algorithms:
-                algo_name = algo["name"]
-                algo_args = algo["args"]
-
-                if algo_name == "multiple_5":
-                    synthesis_times = []
-                    for run in range(1, 6):
-                        command = [
-                            "./tacos.sh",
-                            "--verbose",
-                            "--file",
-                            filepath,
-                        ] + algo_args
-                        print(f"  Running '{algo_name}' - Attempt {run}/5")
-                        stdout, stderr = run_command(command)
-
-                        if stdout is None:
-                            print(
-                                f"    Failed to execute '{algo_name}' on '{filename}'. Skipping this run."
-                            )
+        failed_runs = 0
+        if not done:
+            csvwriter.writerow(params_list)
+        logger.info(f"Results will be written to '{output_csv}'.")
+        if file_entries is None:
+            with os.scandir(input_dir) as it:
+                entries = sorted(
+                    (
+                        entry
+                        for entry in it
+                        if entry.name.endswith(".csv") and entry.is_file()
+                    ),
+                    key=lambda entry: entry.name,
+                )
+            file_entries = [
+                (entry.path, get_file_parameters(entry.name)) for entry in entries
+            ]
+            logger.debug(f"input_dir: {input_dir}")
+        logger.debug([filepath for filepath, _ in file_entries])
+
+        # each tacos.sh invocation is an independent child process, so run them
+        # concurrently and only gather the synthesis times in this thread
+        synthesis_times = {}
+        # the parameter columns of every row written for a file
+        param_rows = {}
+        # files that are symlinks to an identical topology reuse its synthesis times
+        canonical_paths = {}
+        workers = os.cpu_count() or 1
+        # repeated attempts run on links in link_dir so their result files don't collide
+        with tempfile.TemporaryDirectory() as link_dir, concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            # maps each future to the (file, algorithm) of every synthesis it runs
+            futures = {}
+            batch_jobs = []
+            batch_keys = []
+            for filepath, file_params in file_entries:
+                # order the values like the header when the parameters carry its keys
+                keys = param_keys if file_params.keys() == param_key_set else file_params
+                param_rows[filepath] = tuple(str(file_params[key]) for key in keys)
+                canonical_path = canonical_paths.setdefault(
+                    os.path.realpath(filepath), filepath
+                )
+                if cache_path is not None:
+                    digest = file_digest(filepath)
+                for algo in algorithms:
+                    if param_rows[filepath] + (algo["name"],) in done:
+                        logger.debug(
+                            f"    Skipping '{algo['name']}' on '{filepath}', already recorded."
+                        )
+                        continue
+                    canonical_key = (canonical_path, algo["name"])
+                    if canonical_path != filepath and canonical_key in synthesis_times:
+                        # shares the list, so it fills in as the canonical runs finish
+                        synthesis_times[(filepath, algo["name"])] = synthesis_times[
+                            canonical_key
+                        ]
+                        continue
+                    if cache_path is not None:
+                        cache_key = synthesis_cache_key(digest, algo["args"])
+                        if len(cached_times.get(cache_key, [])) >= algo["runs"]:
+                            synthesis_times[(filepath, algo["name"])] = cached_times[
+                                cache_key
+                            ]
                             continue
-
-                        synthesis_time = extract_synthesis_time(stdout)
-                        if synthesis_time is not None:
-                            synthesis_times.append(synthesis_time)
-                            print(f"    Extracted Synthesis Time: {synthesis_time} ps")
+                        cache_keys[(filepath, algo["name"])] = cache_key
+                    synthesis_times[(filepath, algo["name"])] = []
+                    for run in range(1, algo["runs"] + 1):
+                        run_filepath = attempt_file(filepath, run, link_dir)
+                        if batch:
+                            flags = [arg for arg in algo["args"] if arg != "--run"]
+                            batch_jobs.append((flags, run_filepath))
+                            batch_keys.append((filepath, algo["name"]))
                         else:
-                            print(
-                                f"    Synthesis time not found in output for '{algo_name}' on '{filename}'."
-                            )
-
-                    if synthesis_times:
-                        best_time = min(synthesis_times)
-                        row = []
-                        for key in file_params:
-                            row.append(file_params[key])
-                        row.append(algo_name)
-                        row.append(best_time)
-                        csvwriter.writerow(row)
-                        print(
-                            f"    Best Synthesis Time for '{algo_name}': {best_time} ps\n"
-                        )
-                    else:
-                        print(
-                            f"    No valid synthesis times extracted for '{algo_name}' on '{filename}'.\n"
-                        )
-                else:
-                    command = [
-                        "./tacos.sh",
-                        "--verbose",
-                        "--file",
-                        filepath,
-                    ] + algo_args
-                    print(f"  Running '{algo_name}'")
-                    stdout, stderr = run_command(command)
-
-                    if stdout is None:
-                        print(
-                            f"    Failed to execute '{algo_name}' on '{filename}'. Skipping.\n"
+                            command = [
+                                "./tacos.sh",
+                                "--verbose",
+                                "--file",
+                                run_filepath,
+                            ] + algo["args"]
+                            future = executor.submit(run_command, command)
+                            futures[future] = [(filepath, algo["name"])]
+            # deal the batch jobs out round-robin so every worker gets a similar mix
+            for worker in range(min(workers, len(batch_jobs))):
+                future = executor.submit(run_batch, batch_jobs[worker::workers])
+                futures[future] = batch_keys[worker::workers]
+            logger.info(f"  Running {len(futures)} tacos.sh commands")
+
+            for future in concurrent.futures.as_completed(futures):
+                outcomes = future.result() if batch else [future.result()]
+                for (filepath, algo_name), (synthesis_time, stderr) in zip(
+                    futures[future], outcomes
+                ):
+                    if stderr is None:
+                        failed_runs += 1
+                        logger.debug(
+                            f"    Failed to execute '{algo_name}' on '{filepath}'. Skipping this run."
                         )
                         continue
 
-                    synthesis_time = extract_synthesis_time(stdout)
                     if synthesis_time is not None:
-                        row = []
-                        for key in file_params:
-                            row.append(file_params[key])
-                        row.append(algo_name)
-                        row.append(synthesis_time)
-                        csvwriter.writerow(row)
-                        print(
-                            f"    Extracted Synthesis Time for '{algo_name}': {synthesis_time} ps\n"
+                        synthesis_times[(filepath, algo_name)].append(synthesis_time)
+                        logger.debug(
+                            f"    Extracted Synthesis Time for '{algo_name}' on '{filepath}': {synthesis_time} ps"
                         )
                     else:
-                        print(
-                            f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.\n"
+                        logger.debug(
+                            f"    Synthesis time not found in output for '{algo_name}' on '{filepath}'."
                         )
 
-    print("All commands executed and results recorded.\n")
+        if cache_keys:
+            store_synthesis_cache(
+                cache_path,
+                (
+                    (cache_key, synthesis_times[key])
+                    for key, cache_key in cache_keys.items()
+                ),
+            )
+
+        rows = []
+        for filepath, _ in file_entries:
+            for algo in algorithms:
+                algo_name = algo["name"]
+                if (filepath, algo_name) not in synthesis_times:
+                    continue
+                times = synthesis_times[(filepath, algo_name)]
+                if not times:
+                    logger.warning(
+                        f"    No valid synthesis times extracted for '{algo_name}' on '{filepath}'."
+                    )
+                    continue
+
+                best_time = min(times)
+                rows.append(param_rows[filepath] + (algo_name, best_time))
+        csvwriter.writerows(rows)
+        recorded = len(rows)
+
+    logger.info(
+        f"All commands executed: {recorded} results recorded, {failed_runs} runs failed."
+    )
 
 
 def get_used_args(args):
     return {arg: value for arg, value in vars(args).items() if value is not None}
 
 
-def main(params: Dict[str, List[Any]]) -> None:
+def main(
+    params: Dict[str, List[Any]], use_tmpfs: bool = False, processes: int = 1
+) -> None:
     """
     Main function to generate CSV files and process them with tacos.sh commands.
+
+    When use_tmpfs is set the CSV files are only scratch input for tacos.sh, so they are
+    generated in a memory-backed directory under /dev/shm (if available) instead of csvs/.
     """
     directory = os.path.join("csvs", f"{params['topology']}")
     for key, value in params.items():
         if key != "topology":
             directory += f"_{key}{value}"
     output_csv = directory.replace("csvs/", "") + ".csv"
-    create_csv_files(directory, params)
+    if use_tmpfs and os.path.isdir("/dev/shm"):
+        directory = os.path.join(
+            tempfile.mkdtemp(dir="/dev/shm"), os.path.basename(directory)
+        )
+    file_entries = create_csv_files(directory, params, processes)
     # run_tacos_commands(directory, f"ring_results_g{group_sizes}_b{bad_bandwidth_proportions}_m{bad_magnitudes}.csv")
-    # run_tacos_commands(list(params.keys()), directory, output_csv)
-    print("Directory", directory)
+    # run_tacos_commands(
+    #     list(params.keys()), directory, output_csv, file_entries=file_entries
+    # )
+    logger.info(f"Directory {directory}")
 
     # directory = f"ringcsvs_g{gss}_b{bbps}_m{bms}"
     # create_csv_files(gss, bbps, bms, directory)
@@ -486,7 +618,32 @@ if __name__ == "__main__":
         help="The number of nodes in each layer (e.g., 1,4,8)",
     )
     # NOTE: can add more arguments in a similar format as above as needed
+    # default=None keeps the flag out of used_args (and the file names) when absent
+    parser.add_argument(
+        "--tmpfs",
+        action="store_true",
+        default=None,
+        help="Generate the CSV files in a temporary directory under /dev/shm instead of csvs/",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of processes generating the CSV files in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        default=None,
+        help="Log every synthesis run instead of only the summaries",
+    )
 
     args = parser.parse_args()
     used_args = get_used_args(args)
-    main(used_args)
+    use_tmpfs = used_args.pop("tmpfs", False)
+    processes = used_args.pop("processes", 1)
+    logging.basicConfig(
+        level=logging.DEBUG if used_args.pop("verbose", False) else logging.INFO,
+        format="%(message)s",
+    )
+    main(used_args, use_tmpfs, processes)
@@ -1,117 +1,139 @@
 import csv
+import concurrent.futures
 import os
+import sys
 import argparse
-import random
-import subprocess
 import re
-from typing import Optional, Tuple, List
+import hashlib
+import tempfile
+from typing import Optional, Tuple, List, Set, Sequence
+import functools
 import itertools
+import logging
+import multiprocessing
+import numpy as np
 from tqdm import tqdm
 
-# MESH functions 
-def create_mesh_csv_files(group_sizes: str, bad_magnitudes: str, output_dir: str = 'mesh_csvs') -> None:
-    """
-    Generates CSV files representing ring topologies with specified group sizes and proportions of bad bandwidth nodes.
+from tacos_runner import attempt_file, file_digest, load_synthesis_cache, run_batch, run_command, store_synthesis_cache, synthesis_cache_key
 
-    Args:
-        group_sizes (str): The number of nodes in each group.
-        bad_magnitudes (str): The proportions of bad bandwidth nodes.
-        output_dir (str): Directory where CSV files will be stored.
-    """
-    # Create the output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"CSV files will be generated in the '{output_dir}' directory.")
+logger = logging.getLogger(__name__)
+_MESH_FN_RE = re.compile(r'mesh_(\d+)_(\d*\.?\d+)\.csv')
+_RING_FN_RE = re.compile(r'ring_(\d+)_(\d*\.?\d*)_(\d*\.?\d*)\.csv')
+_rng = np.random.default_rng()
+# The synthesizers every topology is run with. The commands are built by appending the file and
+# an algorithm's args to the shared prefix, all tuples so nothing is rebuilt per run.
+_TACOS_FILE_COMMAND = ('./tacos.sh', '--verbose', '--file')
+_ALGORITHMS = (
+    {"name": "random", "args": ("--run",)},
+    {"name": "greedy", "args": ("--greedy", "--run")},
+    {"name": "multiple_5", "args": ("--multiple", "5", "--run")}
+)
+# Progress bars redraw at most once a second, and not at all when stderr isn't a terminal
+_progress = functools.partial(tqdm, mininterval=1.0, disable=not sys.stderr.isatty())
 
-    # No need to split here as the arguments are already strings
-    for group_size, bad_magnitude in tqdm(itertools.product(map(int, group_sizes), map(float, bad_magnitudes))):
-        csv_filename = f"mesh_{group_size}_{bad_magnitude}.csv"
-        csv_path = os.path.join(output_dir, csv_filename)
-        
-        with open(csv_path, 'w', newline='') as csvfile:
-            csvwriter = csv.writer(csvfile)
-            csvwriter.writerow([group_size])
-            csvwriter.writerow(['Src', 'Dest', 'Latency (ns)', 'Bandwidth (GB/s)'])
-            
-            # Calculate the number of bad links based on the proportion
-            # num_bad_links = max(1, int(group_size * bad_magnitude))
-            # bad_links = random.sample(range(group_size), num_bad_links)
-            print(f"Generating CSV: {csv_filename} | Group Size: {group_size} | Bad Magnitude: {bad_magnitude}")
-
-            # Create links between consecutive nodes
-            for i in range(group_size - 1):
-                src = i
-                dest = i + 1
-                latency = 500  # in nanoseconds
-                # bandwidth = 1 if i in bad_links else 50  # Bad bandwidth
-                bandwidth  = 50 # good bandwidth
-                csvwriter.writerow([src, dest, latency, bandwidth])
-                csvwriter.writerow([dest, src, latency, bandwidth])
-            
-            # Closing the ring by connecting the last node to the first
-            src = group_size - 1
-            dest = 0
-            latency = 500
-            bandwidth = 50
-            csvwriter.writerow([src, dest, latency, bandwidth])
-            csvwriter.writerow([dest, src, latency, bandwidth])
-
-            for i in range(group_size):
-                for j in range(group_size):
-                    if i != j and abs(i-j) != 1:
-                        src = i
-                        dest = j
-                        latency = 500
-                        bandwidth = 50 / bad_magnitude
-                        csvwriter.writerow([src, dest, latency, bandwidth])
-                        csvwriter.writerow([dest, src, latency, bandwidth])
-    
-    print("CSV file generation completed.\n")
 
+# SHARED functions
 
-def extract_synthesis_time(output: str) -> Optional[int]:
+def run_synthesis(command: Sequence[str]) -> List[Tuple[Optional[int], Optional[str]]]:
     """
-    Extracts the synthesized collective time in picoseconds from the command output.
+    Runs a single tacos.sh synthesis, reporting its outcome like run_batch does. The output is
+    scanned line by line as it streams in and is not kept, so verbose runs are never buffered
+    whole in memory.
 
     Args:
-        output (str): The standard output from the shell command.
+        command (Sequence[str]): The command and its arguments.
 
     Returns:
-        Optional[int]: The extracted synthesis time in ps, or None if not found.
+        List[Tuple[Optional[int], Optional[str]]]: The synthesis time in ps (None if not found)
+        and stderr, or (None, None) if the command failed.
     """
-    match = re.search(r"Synthesized Collective Time:\s+(\d+)\s+ps", output)
-    if match:
-        return int(match.group(1))
-    else:
-        return None
+    return [run_command(command)]
 
 
-def run_command(command: List[str], cwd: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+# MESH functions 
+def create_mesh_csv_files(group_sizes: str, bad_magnitudes: str, output_dir: str = 'mesh_csvs') -> List[Tuple[str, int, float]]:
     """
-    Executes a shell command and captures its standard output and standard error.
+    Generates CSV files representing ring topologies with specified group sizes and proportions of bad bandwidth nodes.
+    Repeated (group_size, bad_magnitude) pairs are only generated once, and a file whose content is identical
+    to an earlier one (e.g. a group too small to have slow links) is made a symlink to it.
 
     Args:
-        command (List[str]): The command and its arguments as a list.
-        cwd (Optional[str]): Directory to run the command in.
+        group_sizes (str): The number of nodes in each group.
+        bad_magnitudes (str): The proportions of bad bandwidth nodes.
+        output_dir (str): Directory where CSV files will be stored.
 
     Returns:
-        Tuple[Optional[str], Optional[str]]: A tuple containing stdout and stderr, or (None, None) if an error occurs.
+        List[Tuple[str, int, float]]: The path, group_size and bad_magnitude of every file generated.
     """
-    try:
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        return result.stdout, result.stderr
-    except subprocess.CalledProcessError as e:
-        print(f"Command '{' '.join(command)}' failed with exit code {e.returncode}")
-        print(f"Error Output: {e.stderr}")
-        return None, None
-    except FileNotFoundError:
-        print(f"Command not found: {command[0]}")
-        return None, None
+    # Create the output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"CSV files will be generated in the '{output_dir}' directory.")
+
+    # No need to split here as the arguments are already strings. They are parsed once, and
+    # the row constants, which don't depend on the file, are formatted once.
+    sizes = [int(group_size) for group_size in group_sizes]
+    magnitudes = [float(bad_magnitude) for bad_magnitude in bad_magnitudes]
+    # The rows are all plain numbers, so the whole file, header included, is formatted
+    # directly as bytes (with csv's default line terminator) and written at once
+    eol = csv.excel.lineterminator
+    latency = 500  # in nanoseconds
+    bandwidth  = 50 # good bandwidth
+    # bandwidth = 1 if i in bad_links else 50  # Bad bandwidth
+    header_format = f"%d{eol}Src,Dest,Latency (ns),Bandwidth (GB/s){eol}".encode()
+    link_format = f"%d,%d,{latency},{bandwidth}{eol}%d,%d,{latency},{bandwidth}{eol}".encode()
+
+    # the directory part of every path is the same, so it is built once
+    output_dir_prefix = output_dir.rstrip('/') + '/'
+    # maps the digest of each file written so far to its name
+    seen = {}
+    generated = []
+    for group_size, bad_magnitude in _progress(dict.fromkeys(itertools.product(sizes, magnitudes))):
+        csv_filename = f"mesh_{group_size}_{bad_magnitude}.csv"
+        csv_path = output_dir_prefix + csv_filename
+        if os.path.lexists(csv_path):
+            os.remove(csv_path)
+        generated.append((csv_path, group_size, bad_magnitude))
+
+        lines = [header_format % group_size]
+        
+        # Calculate the number of bad links based on the proportion
+        # num_bad_links = max(1, int(group_size * bad_magnitude))
+        # bad_links = random.sample(range(group_size), num_bad_links)
+        logger.debug(f"Generating CSV: {csv_filename} | Group Size: {group_size} | Bad Magnitude: {bad_magnitude}")
+
+        # Create links between consecutive nodes, closing the ring by connecting the last
+        # node to the first. Like the slow links below, the pairs are built with NumPy and
+        # all formatted by one printf-style call.
+        nodes = np.arange(group_size)
+        following = (nodes + 1) % group_size
+        ring = np.column_stack((nodes, following, following, nodes))
+        lines.append((link_format * group_size) % tuple(ring.ravel().tolist()))
+
+        # Connect every non-consecutive pair (j skips i - 1, i and i + 1) with a slow link.
+        # Neighbours are counted around the ring, so the first and last node, which the ring
+        # already joins, don't get a second, slow link. The pairs are picked out of an index
+        # grid with NumPy and all formatted by one printf-style call.
+        slow_bandwidth = 50 / bad_magnitude
+        i, j = np.meshgrid(nodes, nodes, indexing='ij')
+        distance = np.abs(i - j)
+        slow = (distance > 1) & (distance < group_size - 1)
+        pairs = np.column_stack((i[slow], j[slow], j[slow], i[slow]))
+        pair_format = f"%d,%d,{latency},{slow_bandwidth}{eol}%d,%d,{latency},{slow_bandwidth}{eol}".encode()
+        lines.append((pair_format * len(pairs)) % tuple(pairs.ravel().tolist()))
+        body = b"".join(lines)
+
+        # identical content (a repeated file) is linked rather than written again
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if digest in seen:
+            logger.debug(f"{csv_filename} is identical to {seen[digest]}, linking it")
+            os.symlink(seen[digest], csv_path)
+            continue
+        seen[digest] = csv_filename
+        with open(csv_path, 'wb', buffering=1 << 20) as csvfile:
+            csvfile.write(body)
+    
+    logger.info("CSV file generation completed.")
+    return generated
 
 
 def get_mesh_file_parameters(filename: str) -> Tuple[str, str]:
@@ -125,7 +147,7 @@ def get_mesh_file_parameters(filename: str) -> Tuple[str, str]:
     Returns:
         Tuple[str, str]: A tuple containing group_size and bad_magnitude.
     """
-    match = re.match(r'mesh_(\d+)_(\d*\.?\d+)\.csv', filename)
+    match = _MESH_FN_RE.match(filename)
     if match:
         group_size = match.group(1)
         bad_magnitude = match.group(2)
@@ -134,7 +156,8 @@ def get_mesh_file_parameters(filename: str) -> Tuple[str, str]:
         return "N/A", "N/A"
 
 
-def run_mesh_commands(input_dir: str, output_csv: str = 'mesh_results.csv') -> None:
+def run_mesh_commands(input_dir: str, output_csv: str = 'mesh_results.csv', batch: bool = False,
+                      mesh_files: Optional[List[Tuple[str, int, float]]] = None) -> None:
     """
     Executes tacos.sh commands for each CSV file in the input directory, extracts synthesis times,
     and writes the results to an output CSV file.
@@ -142,84 +165,103 @@ def run_mesh_commands(input_dir: str, output_csv: str = 'mesh_results.csv') -> N
     Args:
         input_dir (str): Directory containing input CSV files.
         output_csv (str): Path to the output results CSV file.
+        batch (bool): Feed the syntheses to one long-lived `tacos.sh --batch` process per worker
+            instead of starting tacos.sh for every synthesis.
+        mesh_files (Optional[List[Tuple[str, int, float]]]): The (path, group_size, bad_magnitude) of each
+            file, as returned by create_mesh_csv_files. If not given, every CSV file in input_dir is run
+            and its parameters are parsed from its name.
     """
-    algorithms = [
-        {"name": "random", "args": ["--run"]},
-        {"name": "greedy", "args": ["--greedy", "--run"]},
-        {"name": "multiple_5", "args": ["--multiple", "5", "--run"]}
-    ]
-
-    with open(output_csv, 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['group_size', 'bad_magnitude', 'algorithm', 'synthesis_time_ps'])
-        print(f"Results will be written to '{output_csv}'.\n")
-
-        for filename in tqdm(sorted(os.listdir(input_dir))):
-            if not filename.endswith('.csv'):
+    # the --batch protocol takes the synthesizer flags alone
+    batch_flags = {algo["name"]: tuple(arg for arg in algo["args"] if arg != "--run") for algo in _ALGORITHMS}
+
+    # Every tacos.sh run is an independent child process, so they all run concurrently
+    # and only the synthesis times are gathered here. Repeated attempts run on links in
+    # link_dir so their result files don't collide.
+    files = []
+    synthesis_times = {}
+    # files that are symlinks to an identical topology reuse its synthesis times
+    canonical_files = {}
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as link_dir, concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # maps each future to the (file, algorithm) of every synthesis it runs
+        futures = {}
+        batch_jobs = []
+        batch_keys = []
+        if mesh_files is None:
+            with os.scandir(input_dir) as it:
+                entries = sorted((entry for entry in it if entry.name.endswith('.csv')), key=lambda entry: entry.name)
+            mesh_files = [(entry.path, *get_mesh_file_parameters(entry.name)) for entry in entries]
+        for filepath, group_size, bad_magnitude in mesh_files:
+            filename = os.path.basename(filepath)
+            logger.debug(f"Processing File: {filename} | Group Size: {group_size} | Bad Bandwidth Proportion: {bad_magnitude}")
+            canonical = canonical_files.setdefault(os.path.realpath(filepath), filename)
+            files.append((filename, group_size, bad_magnitude, canonical))
+            if canonical != filename:
+                logger.debug(f"  '{filename}' is a link to '{canonical}', reusing its synthesis times")
                 continue
 
-            filepath = os.path.join(input_dir, filename)
-            group_size, bad_magnitude = get_mesh_file_parameters(filename)
-            print(f"Processing File: {filename} | Group Size: {group_size} | Bad Bandwidth Proportion: {bad_magnitude}")
-
-            for algo in algorithms:
+            for algo in _ALGORITHMS:
                 algo_name = algo["name"]
-                algo_args = algo["args"]
-
-                if algo_name == "multiple_5":
-                    synthesis_times = []
-                    for run in range(1, 6):
-                        command = ["./tacos.sh", "--verbose", "--file", filepath] + algo_args
-                        print(f"  Running '{algo_name}' - Attempt {run}/5")
-                        stdout, stderr = run_command(command)
-
-                        if stdout is None:
-                            print(f"    Failed to execute '{algo_name}' on '{filename}'. Skipping this run.")
-                            continue
-
-                        synthesis_time = extract_synthesis_time(stdout)
-                        if synthesis_time is not None:
-                            synthesis_times.append(synthesis_time)
-                            print(f"    Extracted Synthesis Time: {synthesis_time} ps")
-                        else:
-                            print(f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.")
-
-                    if synthesis_times:
-                        best_time = min(synthesis_times)
-                        csvwriter.writerow([group_size, bad_magnitude, algo_name, best_time])
-                        print(f"    Best Synthesis Time for '{algo_name}': {best_time} ps\n")
+                # multiple_5 is run 5 times and only its best time is recorded
+                runs = 5 if algo_name == "multiple_5" else 1
+                synthesis_times[(filename, algo_name)] = []
+                for run in range(1, runs + 1):
+                    run_filepath = attempt_file(filepath, run, link_dir)
+                    if batch:
+                        batch_jobs.append((batch_flags[algo_name], run_filepath))
+                        batch_keys.append((filename, algo_name))
                     else:
-                        print(f"    No valid synthesis times extracted for '{algo_name}' on '{filename}'.\n")
+                        command = _TACOS_FILE_COMMAND + (run_filepath,) + algo["args"]
+                        futures[executor.submit(run_synthesis, command)] = [(filename, algo_name)]
+        # deal the batch jobs out round-robin, one tacos.sh --batch process per worker
+        for worker in range(min(workers, len(batch_jobs))):
+            futures[executor.submit(run_batch, batch_jobs[worker::workers])] = batch_keys[worker::workers]
+        logger.info(f"  Running {len(futures)} tacos.sh commands")
+
+        for future in _progress(concurrent.futures.as_completed(futures), total=len(futures)):
+            for (filename, algo_name), (synthesis_time, stderr) in zip(futures[future], future.result()):
+                if stderr is None:
+                    logger.warning(f"    Failed to execute '{algo_name}' on '{filename}'. Skipping this run.")
+                    continue
+
+                if synthesis_time is not None:
+                    synthesis_times[(filename, algo_name)].append(synthesis_time)
+                    logger.debug(f"    Extracted Synthesis Time for '{algo_name}' on '{filename}': {synthesis_time} ps")
                 else:
-                    command = ["./tacos.sh", "--verbose", "--file", filepath] + algo_args
-                    print(f"  Running '{algo_name}'")
-                    stdout, stderr = run_command(command)
-
-                    if stdout is None:
-                        print(f"    Failed to execute '{algo_name}' on '{filename}'. Skipping.\n")
-                        continue
-
-                    synthesis_time = extract_synthesis_time(stdout)
-                    if synthesis_time is not None:
-                        csvwriter.writerow([group_size, bad_magnitude, algo_name, synthesis_time])
-                        print(f"    Extracted Synthesis Time for '{algo_name}': {synthesis_time} ps\n")
-                    else:
-                        print(f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.\n")
+                    logger.debug(f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.")
+
+    results = []
+    for filename, group_size, bad_magnitude, canonical in files:
+        for algo in _ALGORITHMS:
+            algo_name = algo["name"]
+            times = synthesis_times[(canonical, algo_name)]
+            if times:
+                results.append((group_size, bad_magnitude, algo_name, min(times)))
+            else:
+                logger.warning(f"    No valid synthesis times extracted for '{algo_name}' on '{filename}'.")
+
+    # All the rows are known by now, so they go out in a single buffered write
+    with open(output_csv, 'w', newline='', buffering=1 << 20) as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['group_size', 'bad_magnitude', 'algorithm', 'synthesis_time_ps'])
+        logger.info(f"Results will be written to '{output_csv}'.")
+        csvwriter.writerows(results)
 
-    print("All commands executed and results recorded.\n")
+    logger.info("All commands executed and results recorded.")
 
 
-def mesh_run(group_sizes: str, bad_magnitudes: str) -> None:
+def mesh_run(group_sizes: str, bad_magnitudes: str, batch: bool = False) -> None:
     """
     Main function to generate CSV files and process them with tacos.sh commands.
 
     Args:
         group_sizes (str): Space-separated string of group sizes.
         bad_magnitudes (str): Space-separated string of bad bandwidth proportions.
+        batch (bool): Run the syntheses through long-lived `tacos.sh --batch` processes.
     """
     mesh_csvs_directory_name = f"mesh_csvs_g{group_sizes}_b{bad_magnitudes}.csv"
-    create_mesh_csv_files(group_sizes, bad_magnitudes, mesh_csvs_directory_name)
-    run_mesh_commands(mesh_csvs_directory_name, f"mesh_results_g{group_sizes}_b{bad_magnitudes}.csv")
+    mesh_files = create_mesh_csv_files(group_sizes, bad_magnitudes, mesh_csvs_directory_name)
+    run_mesh_commands(mesh_csvs_directory_name, f"mesh_results_g{group_sizes}_b{bad_magnitudes}.csv", batch, mesh_files)
 
 
 
@@ -229,98 +271,99 @@ def mesh_run(group_sizes: str, bad_magnitudes: str) -> None:
 
 # RING functions
 
-def create_ring_csv_files(group_sizes, bad_magnitudes, bad_bandwidth_proportions, output_dir: str = 'ring_csvs') -> None:
+def sample_set(n: int, k: int) -> Set[int]:
     """
-    Generates CSV files representing ring topologies with specified group sizes and proportions of bad bandwidth nodes.
+    Samples k distinct integers from range(n) by slicing a NumPy permutation of it.
 
     Args:
-        group_sizes (str): The number of nodes in each group.
-        bad_bandwidth_proportions (str): The proportions of bad bandwidth nodes.
-        output_dir (str): Directory where CSV files will be stored.
-    """
-    # Create the output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"CSV files will be generated in the '{output_dir}' directory.")
-
-    # No need to split here as the arguments are already strings
-    for group_size, magnitude, bad_bandwidth_proportion in tqdm(itertools.product(map(int, group_sizes), map(int, bad_magnitudes), map(float, bad_bandwidth_proportions))):
-        csv_filename = f"ring_{group_size}_{bad_bandwidth_proportion}_{magnitude}.csv"
-        csv_path = os.path.join(output_dir, csv_filename)
-        
-        with open(csv_path, 'w', newline='') as csvfile:
-            csvwriter = csv.writer(csvfile)
-            csvwriter.writerow([group_size])
-            csvwriter.writerow(['Src', 'Dest', 'Latency (ns)', 'Bandwidth (GB/s)'])
-            
-            # Calculate the number of bad links based on the proportion
-            num_bad_links = max(1, int(group_size * bad_bandwidth_proportion))
-            bad_links = random.sample(range(group_size), num_bad_links)
-            print(f"Generating CSV: {csv_filename} | Group Size: {group_size} | Bad Links: {bad_links} | Bad Magnitude: {magnitude}")
-
-            # Create links between consecutive nodes
-            for i in range(group_size - 1):
-                src = i
-                dest = i + 1
-                latency = 500  # in nanoseconds
-                bandwidth = 1 if i not in bad_links else magnitude  # Bad bandwidth
-                csvwriter.writerow([src, dest, latency, bandwidth])
-                csvwriter.writerow([dest, src, latency, bandwidth])
-            
-            # Closing the ring by connecting the last node to the first
-            src = group_size - 1
-            dest = 0
-            latency = 500
-            bandwidth = 1 if (group_size - 1) not in bad_links else magnitude
-            csvwriter.writerow([src, dest, latency, bandwidth])
-            csvwriter.writerow([dest, src, latency, bandwidth])
-        
-    print("CSV file generation completed.\n")
-
+        n (int): Size of the range to sample from.
+        k (int): Number of integers to sample.
 
-def extract_synthesis_time(output: str) -> Optional[int]:
+    Returns:
+        Set[int]: The sampled integers, ready for membership tests.
     """
-    Extracts the synthesized collective time in picoseconds from the command output.
+    return set(_rng.permutation(n)[:k].tolist())
 
-    Args:
-        output (str): The standard output from the shell command.
 
-    Returns:
-        Optional[int]: The extracted synthesis time in ps, or None if not found.
+def _reseed_rng() -> None:
     """
-    match = re.search(r"Synthesized Collective Time:\s+(\d+)\s+ps", output)
-    if match:
-        return int(match.group(1))
-    else:
-        return None
+    Gives a worker process its own random stream, since forked workers would otherwise all
+    inherit (and repeat) the parent's.
+    """
+    global _rng
+    _rng = np.random.default_rng()
 
 
-def run_command(command: List[str], cwd: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+def write_ring_csv_file(group_size: int, magnitude: int, bad_bandwidth_proportion: float, output_dir_prefix: str) -> None:
     """
-    Executes a shell command and captures its standard output and standard error.
+    Generates the CSV file of one ring topology, with a random sample of its links made bad.
 
     Args:
-        command (List[str]): The command and its arguments as a list.
-        cwd (Optional[str]): Directory to run the command in.
+        group_size (int): The number of nodes in the ring.
+        magnitude (int): The bandwidth of the bad links.
+        bad_bandwidth_proportion (float): The proportion of bad links.
+        output_dir_prefix (str): Directory where the CSV file will be stored, ending in '/'.
+    """
+    csv_filename = f"ring_{group_size}_{bad_bandwidth_proportion}_{magnitude}.csv"
+    csv_path = output_dir_prefix + csv_filename
+    
+    with open(csv_path, 'w', newline='', buffering=1 << 20) as csvfile:
+        # Calculate the number of bad links based on the proportion
+        num_bad_links = max(1, int(group_size * bad_bandwidth_proportion))
+        bad_links = sorted(sample_set(group_size, num_bad_links))
+        logger.debug(f"Generating CSV: {csv_filename} | Group Size: {group_size} | Bad Links: {bad_links} | Bad Magnitude: {magnitude}")
+        # bit i is set when the link out of node i is bad
+        bad_mask = 0
+        for link in bad_links:
+            bad_mask |= 1 << link
+
+        # Create links between consecutive nodes, closing the ring by connecting the
+        # last node to the first, and write the file at once like the mesh generator
+        eol = csv.excel.lineterminator
+        latency = 500  # in nanoseconds
+        lines = [f"{group_size}{eol}Src,Dest,Latency (ns),Bandwidth (GB/s){eol}"]
+        for i in range(group_size):
+            src, dest = i, (i + 1) % group_size
+            bandwidth = magnitude if (bad_mask >> i) & 1 else 1  # Bad bandwidth
+            lines.append(f"{src},{dest},{latency},{bandwidth}{eol}{dest},{src},{latency},{bandwidth}{eol}")
+        csvfile.write("".join(lines))
+
+
+def create_ring_csv_files(group_sizes, bad_magnitudes, bad_bandwidth_proportions, output_dir: str = 'ring_csvs', processes: Optional[int] = None) -> None:
+    """
+    Generates CSV files representing ring topologies with specified group sizes and proportions of bad bandwidth nodes.
 
-    Returns:
-        Tuple[Optional[str], Optional[str]]: A tuple containing stdout and stderr, or (None, None) if an error occurs.
+    Args:
+        group_sizes (str): The number of nodes in each group.
+        bad_bandwidth_proportions (str): The proportions of bad bandwidth nodes.
+        output_dir (str): Directory where CSV files will be stored.
+        processes (Optional[int]): Number of worker processes generating files in parallel, one per CPU by default.
     """
-    try:
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
-        return result.stdout, result.stderr
-    except subprocess.CalledProcessError as e:
-        print(f"Command '{' '.join(command)}' failed with exit code {e.returncode}")
-        print(f"Error Output: {e.stderr}")
-        return None, None
-    except FileNotFoundError:
-        print(f"Command not found: {command[0]}")
-        return None, None
+    # Create the output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"CSV files will be generated in the '{output_dir}' directory.")
+
+    # No need to split here as the arguments are already strings. They are parsed once.
+    sizes = tuple(int(group_size) for group_size in group_sizes)
+    magnitudes = tuple(int(magnitude) for magnitude in bad_magnitudes)
+    proportions = tuple(float(bad_bandwidth_proportion) for bad_bandwidth_proportion in bad_bandwidth_proportions)
+    # the directory part of every path is the same, so it is built once
+    output_dir_prefix = output_dir.rstrip('/') + '/'
+    jobs = [
+        (group_size, magnitude, bad_bandwidth_proportion, output_dir_prefix)
+        for group_size, magnitude, bad_bandwidth_proportion in itertools.product(sizes, magnitudes, proportions)
+    ]
+    # every file is independent, so they can be written by a pool of processes
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes > 1:
+        with multiprocessing.Pool(processes, initializer=_reseed_rng) as pool:
+            pool.starmap(write_ring_csv_file, jobs)
+    else:
+        for job in _progress(jobs):
+            write_ring_csv_file(*job)
+        
+    logger.info("CSV file generation completed.")
 
 
 def get_ring_file_parameters(filename: str) -> Tuple[str, str, str]:
@@ -334,7 +377,7 @@ def get_ring_file_parameters(filename: str) -> Tuple[str, str, str]:
     Returns:
         Tuple[str, str]: A tuple containing group_size and bad_bandwidth_proportion.
     """
-    match = re.match(r'ring_(\d+)_(\d*\.?\d*)_(\d*\.?\d*)\.csv', filename)
+    match = _RING_FN_RE.match(filename)
     if match:
         group_size = match.group(1)
         magnitude = match.group(2)
@@ -344,7 +387,7 @@ def get_ring_file_parameters(filename: str) -> Tuple[str, str, str]:
         return "N/A", "N/A", "N/A"
 
 
-def run_ring_tacos_commands(input_dir: str, output_csv: str = 'ring_results.csv') -> None:
+def run_ring_tacos_commands(input_dir: str, output_csv: str = 'ring_results.csv', cache_path: Optional[str] = None) -> None:
     """
     Executes tacos.sh commands for each CSV file in the input directory, extracts synthesis times,
     and writes the results to an output CSV file.
@@ -352,84 +395,103 @@ def run_ring_tacos_commands(input_dir: str, output_csv: str = 'ring_results.csv'
     Args:
         input_dir (str): Directory containing input CSV files.
         output_csv (str): Path to the output results CSV file.
+        cache_path (Optional[str]): shelve database (e.g. '.tacos_cache/ring') of the synthesis times
+            of earlier runs, keyed by file contents and algorithm flags. (file, algorithm) pairs found
+            in it are not run again, and new times are added.
     """
-    algorithms = [
-        {"name": "random", "args": ["--run"]},
-        {"name": "greedy", "args": ["--greedy", "--run"]},
-        {"name": "multiple_5", "args": ["--multiple", "5", "--run"]}
-    ]
-
-    with open(output_csv, 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        csvwriter.writerow(['group_size', 'bad_bandwidth_proportion', 'bad_magnitude','algorithm', 'synthesis_time_ps', ])
-        print(f"Results will be written to '{output_csv}'.\n")
-
-        for filename in tqdm(sorted(os.listdir(input_dir))):
-            if not filename.endswith('.csv'):
-                continue
-
-            filepath = os.path.join(input_dir, filename)
+    # synthesis times of earlier runs, by file digest and algorithm flags
+    cached_times = {}
+    if cache_path is not None:
+        cached_times = load_synthesis_cache(cache_path)
+    # maps the (file, algorithm) pairs that are run to their cache key
+    cache_keys = {}
+
+    # Every tacos.sh run, including each attempt of multiple_5, is an independent child
+    # process, so they all run concurrently and only the synthesis times are gathered here.
+    # Each output is scanned as it streams in and is never buffered whole, and the later
+    # attempts run on links in link_dir so their result files don't collide.
+    files = []
+    synthesis_times = {}
+    with tempfile.TemporaryDirectory() as link_dir, concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        # maps each future to the (file, algorithm, attempt) it runs
+        futures = {}
+        with os.scandir(input_dir) as it:
+            entries = sorted((entry for entry in it if entry.name.endswith('.csv')), key=lambda entry: entry.name)
+        for entry in entries:
+            filename = entry.name
+            filepath = entry.path
             group_size, magnitude, bad_bandwidth_proportion = get_ring_file_parameters(filename)
-            print(f"Processing File: {filename} | Group Size: {group_size} | Bad Bandwidth Proportion: {bad_bandwidth_proportion} | Bad Magnitude: {magnitude}")
+            logger.debug(f"Processing File: {filename} | Group Size: {group_size} | Bad Bandwidth Proportion: {bad_bandwidth_proportion} | Bad Magnitude: {magnitude}")
+            files.append((filename, group_size, magnitude, bad_bandwidth_proportion))
+            if cache_path is not None:
+                digest = file_digest(filepath)
 
-            for algo in algorithms:
+            for algo in _ALGORITHMS:
                 algo_name = algo["name"]
-                algo_args = algo["args"]
-
-                if algo_name == "multiple_5":
-                    synthesis_times = []
-                    for run in range(1, 6):
-                        command = ["./tacos.sh", "--verbose", "--file", filepath] + algo_args
-                        print(f"  Running '{algo_name}' - Attempt {run}/5")
-                        stdout, stderr = run_command(command)
-
-                        if stdout is None:
-                            print(f"    Failed to execute '{algo_name}' on '{filename}'. Skipping this run.")
-                            continue
-
-                        synthesis_time = extract_synthesis_time(stdout)
-                        if synthesis_time is not None:
-                            synthesis_times.append(synthesis_time)
-                            print(f"    Extracted Synthesis Time: {synthesis_time} ps")
-                        else:
-                            print(f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.")
-
-                    if synthesis_times:
-                        best_time = min(synthesis_times)
-                        csvwriter.writerow([group_size, bad_bandwidth_proportion, magnitude,algo_name, best_time])
-                        print(f"    Best Synthesis Time for '{algo_name}': {best_time} ps\n")
-                    else:
-                        print(f"    No valid synthesis times extracted for '{algo_name}' on '{filename}'.\n")
-                else:
-                    command = ["./tacos.sh", "--verbose", "--file", filepath] + algo_args
-                    print(f"  Running '{algo_name}'")
-                    stdout, stderr = run_command(command)
-
-                    if stdout is None:
-                        print(f"    Failed to execute '{algo_name}' on '{filename}'. Skipping.\n")
+                # multiple_5 is run 5 times and only its best time is recorded
+                runs = 5 if algo_name == "multiple_5" else 1
+                if cache_path is not None:
+                    cache_key = synthesis_cache_key(digest, algo["args"])
+                    if len(cached_times.get(cache_key, [])) >= runs:
+                        logger.debug(f"  Reusing the cached synthesis times of '{algo_name}' on '{filename}'")
+                        synthesis_times[(filename, algo_name)] = cached_times[cache_key]
                         continue
+                    cache_keys[(filename, algo_name)] = cache_key
+                synthesis_times[(filename, algo_name)] = []
+                for run in range(1, runs + 1):
+                    command = _TACOS_FILE_COMMAND + (attempt_file(filepath, run, link_dir),) + algo["args"]
+                    futures[executor.submit(run_command, command)] = (filename, algo_name, run)
+        logger.info(f"  Running {len(futures)} tacos.sh commands")
+
+        for future in _progress(concurrent.futures.as_completed(futures), total=len(futures)):
+            filename, algo_name, run = futures[future]
+            synthesis_time, stderr = future.result()
+            if stderr is None:
+                logger.warning(f"    Attempt {run}: Failed to execute '{algo_name}' on '{filename}'. Skipping this run.")
+                continue
 
-                    synthesis_time = extract_synthesis_time(stdout)
-                    if synthesis_time is not None:
-                        csvwriter.writerow([group_size, bad_bandwidth_proportion, magnitude, algo_name, synthesis_time])
-                        print(f"    Extracted Synthesis Time for '{algo_name}': {synthesis_time} ps\n")
-                    else:
-                        print(f"    Synthesis time not found in output for '{algo_name}' on '{filename}'.\n")
+            if synthesis_time is not None:
+                synthesis_times[(filename, algo_name)].append(synthesis_time)
+                logger.debug(f"    Attempt {run}: Extracted Synthesis Time for '{algo_name}' on '{filename}': {synthesis_time} ps")
+            else:
+                logger.debug(f"    Attempt {run}: Synthesis time not found in output for '{algo_name}' on '{filename}'.")
+
+    if cache_keys:
+        store_synthesis_cache(cache_path, ((cache_key, synthesis_times[key]) for key, cache_key in cache_keys.items()))
+
+    results = []
+    for filename, group_size, magnitude, bad_bandwidth_proportion in files:
+        for algo in _ALGORITHMS:
+            algo_name = algo["name"]
+            times = synthesis_times[(filename, algo_name)]
+            if times:
+                results.append((group_size, bad_bandwidth_proportion, magnitude, algo_name, min(times)))
+            else:
+                logger.warning(f"    No valid synthesis times extracted for '{algo_name}' on '{filename}'.")
+
+    # All the rows are known by now, so they go out in a single buffered write
+    with open(output_csv, 'w', newline='', buffering=1 << 20) as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['group_size', 'bad_bandwidth_proportion', 'bad_magnitude','algorithm', 'synthesis_time_ps', ])
+        logger.info(f"Results will be written to '{output_csv}'.")
+        csvwriter.writerows(results)
 
-    print("All commands executed and results recorded.\n")
+    logger.info("All commands executed and results recorded.")
 
 
-def ring_run(group_sizes, bad_magnitudes, bad_bandwidth_proportions) -> None:
+def ring_run(group_sizes, bad_magnitudes, bad_bandwidth_proportions, cache_path: Optional[str] = None, processes: Optional[int] = None) -> None:
     """
     Main function to generate CSV files and process them with tacos.sh commands.
 
     Args:
         group_sizes 
         bad_bandwidth_proportions 
+        cache_path (Optional[str]): shelve database of earlier synthesis times to reuse and extend.
+        processes (Optional[int]): Number of processes generating the CSV files in parallel, one per CPU by default.
     """
     directory = f"ringcsvs_g{group_sizes}_m{bad_magnitudes}_b{bad_bandwidth_proportions}"
-    create_ring_csv_files(group_sizes, bad_magnitudes, bad_bandwidth_proportions, directory)
-    run_ring_tacos_commands(directory, f"ring_results_g{group_sizes}_m{bad_magnitudes}_b{bad_bandwidth_proportions}.csv")
+    create_ring_csv_files(group_sizes, bad_magnitudes, bad_bandwidth_proportions, directory, processes)
+    run_ring_tacos_commands(directory, f"ring_results_g{group_sizes}_m{bad_magnitudes}_b{bad_bandwidth_proportions}.csv", cache_path)
 
 
 if __name__ == "__main__":
@@ -464,11 +526,33 @@ if __name__ == "__main__":
         nargs='+',
         help="The proportions of bad bandwidth nodes (e.g., 0.1 0.2 0.3)"
     )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every generated file and synthesis run instead of only the summaries"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Feed the syntheses to long-lived 'tacos.sh --batch' processes (mesh only)"
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        metavar="PATH",
+        help="Reuse and extend the synthesis times stored in this shelve database, e.g. .tacos_cache/ring (ring only)"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of processes generating the CSV files in parallel (ring only, default: one per CPU)"
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
     if args.topology=="ring": 
-        ring_run(args.group_sizes, args.bad_magnitudes, args.bad_bandwidth_proportions)
+        ring_run(args.group_sizes, args.bad_magnitudes, args.bad_bandwidth_proportions, args.cache, args.processes)
     elif args.topology=="mesh":
-        mesh_run(args.group_sizes, args.bad_magnitudes)
+        mesh_run(args.group_sizes, args.bad_magnitudes, args.batch)
     else: 
         print("Topology not supported. Please use ring topology")
         exit(1)
\ No newline at end of file
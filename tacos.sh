@@ -44,6 +44,24 @@ function run {
     fi
 }
 
+# run TACOS once per "<flags>\t<filename>" line read from stdin (flags being empty,
+# --greedy, --multiple <integer>, or --beam <integer>), printing
+# "<filename>\t<flags>\t<exit status>\t<synthesized collective time in ps>" for each
+function run_batch {
+    while IFS= read -r line; do
+        # split by hand, since read would swallow the leading tab of empty flags
+        flags="${line%%$'\t'*}"
+        file="${line#*$'\t'}"
+        # flags is intentionally unquoted so "--multiple 5" splits into two arguments,
+        # and the exit status reported is TACOS's own rather than the last filter's
+        # shellcheck disable=SC2086
+        time_ps=$(./build/bin/tacos "$file" $flags \
+            | sed -n 's/.*Synthesized Collective Time:[[:space:]]*\([0-9]*\)[[:space:]]*ps.*/\1/p' \
+            | head -n 1; exit "${PIPESTATUS[0]}") && status=0 || status=$?
+        printf "%s\t%s\t%s\t%s\n" "$file" "$flags" "$status" "$time_ps"
+    done
+}
+
 # cleanup build
 function cleanup {
     rm -f "$PROJECT_DIR/extern/chakra/schema/protobuf/et_def.pb.h"
@@ -61,6 +79,7 @@ function print_help {
     printf "\t--beam (-b) <integer>: Specify the beam integer for TACOS\n"
     printf "\t--multiple (-m) <integer>: Specify the multiple integer for TACOS\n"
     printf "\t--greedy (-g): Run TACOS in greedy mode\n"
+    printf "\t--batch (-B): Run the compiled TACOS executable on every \"<flags>\\\\t<filename>\" line from stdin\n"
     printf "\t--clean (-l): Remove the TACOS build directory\n"
     printf "\t(noflag): Compile and execute TACOS with required parameters\n"
 }
@@ -92,6 +111,10 @@ while [[ "$#" -gt 0 ]]; do
             compile_chakra
             exit 0
             ;;
+        -B|--batch)
+            run_batch
+            exit 0
+            ;;
 
         -v|--verbose)
             verbose=true
@@ -0,0 +1,244 @@
+# Helpers for running tacos.sh and reading its results, shared by the benchmarking
+# scripts
+import hashlib
+import logging
+import os
+import re
+import shelve
+import subprocess
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+# tacos.sh children run in the C locale, which keeps libc's formatting and the batch mode's
+# sed scan of the output off the slower multibyte (UTF-8) code paths
+TACOS_ENV = {**os.environ, "LC_ALL": "C", "LANG": "C"}
+_SYN_RE = re.compile(r"Synthesized Collective Time:\s+(\d+)\s+ps")
+_SYN_PREFIX = "Synthesized Collective Time:"
+
+
+def extract_synthesis_time(output: str) -> Optional[int]:
+    """
+    Extracts the synthesized collective time in picoseconds from the command output.
+
+    Args:
+        output (str): The standard output from the shell command.
+
+    Returns:
+        Optional[int]: The extracted synthesis time in ps, or None if not found.
+    """
+    # a plain substring search skips the regex for output without the time line, and
+    # any match has to start at or after the first occurrence of its literal prefix
+    start = output.find(_SYN_PREFIX)
+    if start < 0:
+        return None
+    match = _SYN_RE.search(output, start)
+    if match:
+        return int(match.group(1))
+    else:
+        return None
+
+
+def run_command(
+    command: List[str], cwd: Optional[str] = None
+) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Executes a shell command, scanning its standard output for the synthesized collective
+    time line by line as it is produced rather than buffering the whole output.
+
+    Args:
+        command (List[str]): The command and its arguments as a list.
+        cwd (Optional[str]): Directory to run the command in.
+
+    Returns:
+        Tuple[Optional[int], Optional[str]]: A tuple containing the synthesis time in ps (None if
+        it was not printed) and stderr, or (None, None) if an error occurs.
+    """
+    synthesis_time = None
+    try:
+        # stderr goes to a file so a chatty child can't block on a full pipe
+        # while stdout is being read
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            with subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                cwd=cwd,
+                env=TACOS_ENV,
+                bufsize=1 << 16,
+            ) as process:
+                for line in process.stdout:
+                    synthesis_time = extract_synthesis_time(line)
+                    if synthesis_time is not None:
+                        break
+                # drain the rest in large chunks, unparsed, so the child can exit cleanly
+                while process.stdout.read(1 << 16):
+                    pass
+            stderr_file.seek(0)
+            stderr = stderr_file.read()
+    except FileNotFoundError:
+        logger.warning(f"Command not found: {command[0]}")
+        return None, None
+
+    if process.returncode != 0:
+        logger.warning(
+            f"Command '{' '.join(command)}' failed with exit code {process.returncode}"
+        )
+        logger.debug(f"Error Output: {stderr}")
+        return None, None
+    return synthesis_time, stderr
+
+
+def run_batch(
+    jobs: List[Tuple[List[str], str]]
+) -> List[Tuple[Optional[int], Optional[str]]]:
+    """
+    Runs several syntheses through a single `tacos.sh --batch` process, so the script's
+    startup is paid once per batch rather than once per synthesis.
+
+    Args:
+        jobs (List[Tuple[List[str], str]]): (synthesizer flags, file) pairs, e.g.
+            (["--multiple", "5"], "ring.csv"). Empty flags select the default synthesizer.
+
+    Returns:
+        List[Tuple[Optional[int], Optional[str]]]: One (synthesis time in ps, stderr) tuple per
+        job as returned by run_command, or (None, None) for every job that failed or got no
+        result line, and for every job if the batch itself fails. The jobs share the
+        batch's stderr.
+    """
+    requests = "".join(f"{' '.join(flags)}\t{filepath}\n" for flags, filepath in jobs)
+    try:
+        result = subprocess.run(
+            ["./tacos.sh", "--batch"],
+            input=requests,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=TACOS_ENV,
+            check=False,
+        )
+    except FileNotFoundError:
+        logger.warning("Command not found: ./tacos.sh")
+        return [(None, None)] * len(jobs)
+    if result.returncode != 0:
+        logger.warning(
+            f"Batch of {len(jobs)} jobs failed with exit code {result.returncode}"
+        )
+        logger.debug(f"Error Output: {result.stderr}")
+        return [(None, None)] * len(jobs)
+
+    # one "<file>\t<flags>\t<exit status>\t<time>" line per job, in job order
+    lines = result.stdout.splitlines()
+    if len(lines) != len(jobs):
+        logger.warning(
+            f"Batch of {len(jobs)} jobs printed {len(lines)} result lines, "
+            "jobs without their own line count as failed"
+        )
+        lines = lines[: len(jobs)] + [""] * (len(jobs) - len(lines))
+    outcomes = []
+    for (flags, filepath), line in zip(jobs, lines):
+        fields = line.split("\t")
+        if len(fields) != 4 or fields[0] != filepath:
+            logger.warning(f"No result line for '{' '.join(flags)}' on '{filepath}'")
+            outcomes.append((None, None))
+            continue
+        _, _, status, synthesis_time = fields
+        if status != "0":
+            logger.warning(
+                f"'{' '.join(flags)}' on '{filepath}' failed with exit code {status}"
+            )
+            outcomes.append((None, None))
+            continue
+        outcomes.append((int(synthesis_time) if synthesis_time else None, result.stderr))
+    return outcomes
+
+
+def attempt_file(filepath: str, attempt: int, link_dir: str) -> str:
+    """
+    Returns the file to run one attempt of a repeated synthesis on. TACOS writes its
+    result to '<input name>_<synthesizer>_result.csv' in the working directory, so
+    concurrent attempts on the same file would overwrite each other's results. The first
+    attempt runs on the file itself, and every later one on a symlink named after the
+    attempt, e.g. '<link_dir>/ring_8_attempt2.csv', whose result is written to
+    'ring_8_attempt2_multiple_5_result.csv'.
+
+    Args:
+        filepath (str): The topology file.
+        attempt (int): The attempt number, counting from 1.
+        link_dir (str): Directory to create the attempt's symlink in, e.g. a temporary
+            directory living as long as the runs.
+
+    Returns:
+        str: The path to pass to tacos.sh for this attempt.
+    """
+    if attempt == 1:
+        return filepath
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    link = os.path.join(link_dir, f"{stem}_attempt{attempt}.csv")
+    if not os.path.lexists(link):
+        os.symlink(os.path.abspath(filepath), link)
+    return link
+
+
+def file_digest(filepath: str) -> str:
+    """
+    Digests a topology file's contents, identifying it in the synthesis time cache
+    independently of its name.
+
+    Args:
+        filepath (str): Path of the file.
+
+    Returns:
+        str: The hex digest of the file's contents.
+    """
+    with open(filepath, "rb") as csvfile:
+        return hashlib.blake2b(csvfile.read(), digest_size=16).hexdigest()
+
+
+def synthesis_cache_key(digest: str, args: Iterable[str]) -> str:
+    """
+    Builds the cache key of one synthesizer run on a file.
+
+    Args:
+        digest (str): The file's digest, as returned by file_digest.
+        args (Iterable[str]): The synthesizer's tacos.sh arguments.
+
+    Returns:
+        str: The key its synthesis times are stored under.
+    """
+    return f"{digest} {' '.join(args)}"
+
+
+def load_synthesis_cache(cache_path: str) -> Dict[str, List[int]]:
+    """
+    Reads the synthesis times of earlier runs from a shelve database, creating its
+    directory if needed.
+
+    Args:
+        cache_path (str): The shelve database, e.g. '.tacos_cache/results'.
+
+    Returns:
+        Dict[str, List[int]]: The synthesis times in ps, by synthesis_cache_key.
+    """
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with shelve.open(cache_path) as cache:
+        return dict(cache)
+
+
+def store_synthesis_cache(
+    cache_path: str, entries: Iterable[Tuple[str, List[int]]]
+) -> None:
+    """
+    Adds new synthesis times to a shelve database. Entries without any times, e.g. ones
+    whose runs all failed, are left out so they are tried again next time.
+
+    Args:
+        cache_path (str): The shelve database, as passed to load_synthesis_cache.
+        entries (Iterable[Tuple[str, List[int]]]): (synthesis_cache_key, synthesis times
+            in ps) pairs. Keys may repeat, e.g. for files with identical contents.
+    """
+    with shelve.open(cache_path) as cache:
+        for cache_key, times in entries:
+            if times:
+                cache[cache_key] = times
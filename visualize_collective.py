@@ -1,7 +1,6 @@
 import csv
 import argparse
 import numpy as np
-import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
@@ -36,32 +35,23 @@ def process_collective_algo(filename):
             elif i == 5 and row[0].startswith("SrcID"):
                 header = row
             elif i >= 6:
-                src_id = int(row[0])
-                dest_id = int(row[1])
-                latency_ns = int(row[2])
+                src_id, dest_id, latency_ns = map(int, row[:3])
                 bandwidth_gbps = float(row[3])
 
-                # Parse Chunks column
-                chunks = []
-                for chunk in row[4:]:
-                    if chunk == "None":
-                        break
-                    chunk_id, arrival_time_ps, _ = chunk.split(":")
-                    arrival_time_ns = int(
-                        arrival_time_ps) / 1000  # Convert ps to ns
-                    chunks.append((int(chunk_id), arrival_time_ns))
-
-                connection = {
-                    "SrcID": src_id,
-                    "DestID": dest_id,
-                    "Latency (ns)": latency_ns,
-                    "Bandwidth (GB/s=B/ns)": bandwidth_gbps,
-                    "Chunks (ID:ns)": chunks,
-                }
+                # Parse Chunks column, "ID:ps:..." per chunk or a lone "None" when no
+                # chunk crosses the link
+                chunk_fields = () if row[4:5] == ["None"] else row[4:]
+                chunks = [
+                    (int(chunk_id), int(arrival_time_ps) / 1000)  # Convert ps to ns
+                    for chunk_id, arrival_time_ps, _ in (
+                        chunk.split(":", 2) for chunk in chunk_fields
+                    )
+                ]
+
+                # (SrcID, DestID, Latency (ns), Bandwidth (GB/s=B/ns), Chunks (ID:ns))
+                connection = (src_id, dest_id, latency_ns, bandwidth_gbps, chunks)
                 data["Connections"].append(connection)
 
-    # Convert Connections to a DataFrame for easier manipulation
-    data["Connections"] = pd.DataFrame(data["Connections"])
     return data
 
 
@@ -72,35 +62,44 @@ def main():
     )
     args = parser.parse_args()
     results = process_collective_algo(args.filename)
-    df = results["Connections"]
-
-    df["Latency (ns)"] = df["Latency (ns)"].astype(float)
-    df["Bandwidth (GB/s=B/ns)"] = df["Bandwidth (GB/s=B/ns)"].astype(float)
-
-    # Calculate link crossing times (time to traverse each link)
-    df["Link Time (ns)"] = df["Latency (ns)"] + (
-        (results["Chunk_Size"]) / (1 << 30)
-    ) * (1e9 / df["Bandwidth (GB/s=B/ns)"])
+    chunk_size_gb = results["Chunk_Size"] / (1 << 30)
 
-    # Create network graph
+    # Create network graph, with the link crossing times (time to traverse each link)
     G = nx.DiGraph()
-    for _, row in df.iterrows():
-        G.add_edge(
-            row["SrcID"],
-            row["DestID"],
-            link_time=row["Link Time (ns)"],
-            chunks=row["Chunks (ID:ns)"],
-        )
+    edge_labels = {}
+    for src, dest, latency_ns, bandwidth_gbps, chunks in results["Connections"]:
+        link_time = latency_ns + chunk_size_gb * (1e9 / bandwidth_gbps)
+        G.add_edge(src, dest, link_time=link_time, chunks=chunks)
+        edge_labels[(src, dest)] = f"{link_time:.2f} ns"
 
     # Initialize plot
     pos = nx.spring_layout(G)
     fig, ax = plt.subplots(figsize=(8, 6))
-    nx.draw(G, pos, with_labels=True, ax=ax, node_size=500, font_size=10)
-    edge_labels = {
-        (row["SrcID"], row["DestID"]): f"{row['Link Time (ns)']:.2f} ns"
-        for _, row in df.iterrows()
-    }
+    # The graph is static, so it is drawn once as a few collections: every edge in one
+    # LineCollection (no per-edge arrow patches) with its arrowhead in a single quiver,
+    # every node in one PathCollection, plus the node and edge label texts. The heads
+    # sit short of the destination node, so both directions of a link show.
+    nx.draw_networkx_edges(G, pos, ax=ax, arrows=False)
+    src_pos = np.array([pos[src] for src, _ in G.edges]).reshape(-1, 2)
+    dest_pos = np.array([pos[dest] for _, dest in G.edges]).reshape(-1, 2)
+    delta_pos = dest_pos - src_pos
+    ax.quiver(
+        *(src_pos + 0.7 * delta_pos).T,
+        *(delta_pos / np.linalg.norm(delta_pos, axis=1, keepdims=True)).T,
+        angles="xy",
+        pivot="tip",
+        units="inches",
+        width=0.01,
+        headwidth=6,
+        headlength=8,
+        headaxislength=7,
+        scale_units="inches",
+        scale=10,
+    )
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=500)
+    nx.draw_networkx_labels(G, pos, ax=ax, font_size=10)
     nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, ax=ax)
+    ax.set_axis_off()
 
     # Set up the slider
     max_ns = results["Collective_Time"] / 1000
@@ -114,91 +113,146 @@ def main():
     play_button = Button(
         ax_button, "Play", color="lightgrey", hovercolor="0.8")
 
-    # Animation setup
-    chunk_positions = {edge: [] for edge in G.edges}
+    # Animation setup: one entry per chunk crossing a link, in edge order, holding
+    # the link's start point and direction so a frame only has to scale along it
+    chunk_ids, chunk_dests = [], []
+    start_times, arrival_times, link_times, src_xy, delta_xy = [], [], [], [], []
 
     # Calculate departure times based on arrival times and link crossing times
     for (src, dest), data in G.edges.items():
         for chunk_id, arrival_time_ns in data["chunks"]:
-            link_time = G[src][dest]["link_time"]
-            start_time_ns = arrival_time_ns - link_time  # Calculate the departure time
-            chunk_positions[(src, dest)].append(
-                (chunk_id, start_time_ns, arrival_time_ns)
-            )
+            link_time = data["link_time"]
+            chunk_ids.append(chunk_id)
+            chunk_dests.append(dest)
+            start_times.append(arrival_time_ns - link_time)  # the departure time
+            arrival_times.append(arrival_time_ns)
+            link_times.append(link_time)
+            src_xy.append(pos[src])
+            delta_xy.append(pos[dest] - pos[src])
+    start_times = np.array(start_times)
+    arrival_times = np.array(arrival_times)
+    link_times = np.array(link_times)
+    src_xy = np.array(src_xy).reshape(-1, 2)
+    delta_xy = np.array(delta_xy).reshape(-1, 2)
+
+    # The graph drawn above never changes, so only these artists are updated by each
+    # frame and blitted over it: the moving chunks, a label for each chunk that may be
+    # moving, the chunks that have arrived at each node, the time readout and the
+    # slider's moving parts. FuncAnimation saves the background of their axes, so
+    # they are animated from the start to keep them out of it, and the time is shown
+    # inside the main axes rather than in its title, which is outside the blitted area.
+    chunk_markers, = ax.plot([], [], "o", color="red", markersize=5, animated=True)
+    chunk_labels = [
+        ax.text(
+            0,
+            0,
+            "",
+            color="black",
+            ha="center",
+            fontsize=8,
+            visible=False,
+            animated=True,
+        )
+        for _ in chunk_ids
+    ]
+    arrived_labels = {
+        node: ax.text(
+            pos[node][0],
+            pos[node][1] - 0.05,
+            "",
+            color="red",
+            fontsize=8,
+            ha="center",
+            verticalalignment="top",
+            animated=True,
+        )
+        for node in G.nodes
+    }
+    time_text = ax.text(
+        0.5,
+        1,
+        "",
+        transform=ax.transAxes,
+        ha="center",
+        verticalalignment="top",
+        fontsize="large",
+        animated=True,
+    )
+    # the slider's value text is outside its axes too, the time readout replaces it
+    slider.valtext.set_visible(False)
+    slider_artists = [slider.poly, *ax_slider.lines]
+    for artist in slider_artists:
+        artist.set_animated(True)
+    # the slider is redrawn with the frame it shows, not by a full redraw of its own
+    slider.drawon = False
+    dynamic_artists = [
+        chunk_markers,
+        *chunk_labels,
+        *arrived_labels.values(),
+        time_text,
+        *slider_artists,
+    ]
+
+    # Nothing is blitted while paused, so the dynamic artists are put back into the
+    # full redraws; the animation marks them animated again once it plays
+    def show_paused():
+        for artist in dynamic_artists:
+            artist.set_animated(False)
+        fig.canvas.draw_idle()
 
     is_playing = False
     current_frame = 0
-    updating_slider = False
 
     def update(frame):
-        nonlocal current_frame, updating_slider
+        nonlocal current_frame
         current_frame = frame  # Update current frame
 
-        if not updating_slider:
-            updating_slider = True  # Avoid recursive slider update
-            slider.set_val(frame)  # Sync slider with animation frame
-            updating_slider = False  # Reset flag after updating slider
-        ax.clear()
-        nx.draw(G, pos, with_labels=True, ax=ax, node_size=500, font_size=10)
-        nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, ax=ax)
+        # Sync slider with animation frame, without calling on_slider_change back
+        slider.eventson = False
+        slider.set_val(frame)
+        slider.eventson = True
 
         frame_ns = frame
+        # Start moving a chunk only after its calculated departure time
+        moving = np.flatnonzero((start_times <= frame_ns) & (frame_ns < arrival_times))
+        move_pos = np.minimum(1, (frame_ns - start_times[moving]) / link_times[moving])
+        chunk_xy = src_xy[moving] + move_pos[:, None] * delta_xy[moving]
+
+        # Plot the moving chunks with labels
+        chunk_markers.set_data(chunk_xy[:, 0], chunk_xy[:, 1])
+        for label, i, (chunk_x, chunk_y) in zip(chunk_labels, moving, chunk_xy):
+            label.set_text(str(chunk_ids[i]))
+            label.set_position((chunk_x, chunk_y + 0.03))
+            label.set_visible(True)
+        for label in chunk_labels[len(moving):]:
+            label.set_visible(False)
+
+        # If a chunk has arrived at the destination, add it to arrived_chunks
         arrived_chunks = {node: [] for node in G.nodes}
-        for (src, dest), chunks in chunk_positions.items():
-            for chunk_id, start_time_ns, arrival_time_ns in chunks:
-                # Start moving the chunk only after its calculated departure time
-                if start_time_ns <= frame_ns < arrival_time_ns:
-                    move_pos = min(
-                        1, (frame_ns - start_time_ns) /
-                        G[src][dest]["link_time"]
-                    )
-                    chunk_x = (1 - move_pos) * \
-                        pos[src][0] + move_pos * pos[dest][0]
-                    chunk_y = (1 - move_pos) * \
-                        pos[src][1] + move_pos * pos[dest][1]
-
-                    # Plot the moving chunk with label
-                    ax.plot(chunk_x, chunk_y, "o", color="red", markersize=5)
-                    ax.text(
-                        chunk_x,
-                        chunk_y + 0.03,
-                        str(chunk_id),
-                        color="black",
-                        ha="center",
-                        fontsize=8,
-                    )
-                elif (
-                    frame_ns >= arrival_time_ns and chunk_id not in arrived_chunks[dest]
-                ):
-                    # If the chunk has arrived at the destination, add it to arrived_chunks
-                    arrived_chunks[dest].append(chunk_id)
+        for i in np.flatnonzero(frame_ns >= arrival_times):
+            if chunk_ids[i] not in arrived_chunks[chunk_dests[i]]:
+                arrived_chunks[chunk_dests[i]].append(chunk_ids[i])
 
         # Display arrived chunks next to each destination node
-        for dest in arrived_chunks:
-            ax.text(
-                pos[dest][0],
-                pos[dest][1] - 0.05,
-                f"{arrived_chunks[dest]}",
-                color="red",
-                fontsize=8,
-                ha="center",
-                verticalalignment="top",
-            )
-
-        ax.set_title(f"Network Animation - {frame_ns:.4f} ns")
-        ax.axis("off")
+        for dest, label in arrived_labels.items():
+            label.set_text(f"{arrived_chunks[dest]}")
+
+        time_text.set_text(f"Network Animation - {frame_ns:.4f} ns")
 
         # Stop animation if the collective time has been reached
         if frame_ns >= results["Collective_Time"] / 1000:
             ani.event_source.stop()
+            show_paused()
+
+        return dynamic_artists
 
     # Handle slider changes to update frame
     def on_slider_change(val):
-        nonlocal current_frame, is_playing
-        if not updating_slider:  # Prevent recursion
-            current_frame = slider.val
-            if not is_playing:
-                update(current_frame)
+        nonlocal current_frame
+        current_frame = slider.val
+        if not is_playing:
+            update(current_frame)
+            show_paused()
 
     slider.on_changed(on_slider_change)
 
@@ -208,6 +262,7 @@ def main():
         if is_playing:
             ani.event_source.stop()
             play_button.label.set_text("Play")
+            show_paused()
         else:
             ani.frame_seq = ani.new_frame_seq()
             ani.event_source.start()
@@ -218,7 +273,13 @@ def main():
 
     # Initialize animation
     ani = animation.FuncAnimation(
-        fig, update, frames=np.linspace(0, max_ns, num=100), interval=50, repeat=False
+        fig,
+        update,
+        frames=np.linspace(0, max_ns, num=100),
+        interval=50,
+        repeat=False,
+        blit=True,
+        cache_frame_data=False,
     )
     plt.show()
 